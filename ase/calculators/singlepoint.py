@@ -80,14 +80,12 @@ def arrays_to_kpoints(eigenvalues, occupations, weights):
     nspins, nkpts, nbands = eigenvalues.shape
     assert eigenvalues.shape == occupations.shape
     assert len(weights) == nkpts
-    kpts = []
-    for s in range(nspins):
-        for k in range(nkpts):
-            kpt = SinglePointKPoint(
-                weight=weights[k], s=s, k=k,
-                eps_n=eigenvalues[s, k], f_n=occupations[s, k])
-            kpts.append(kpt)
-    return kpts
+    # Make sure that every eps_n/f_n below is a contiguous row view
+    eigenvalues = np.ascontiguousarray(eigenvalues)
+    occupations = np.ascontiguousarray(occupations)
+    return [SinglePointKPoint(weight=weights[k], s=s, k=k,
+                              eps_n=eigenvalues[s, k], f_n=occupations[s, k])
+            for s in range(nspins) for k in range(nkpts)]
 
 
 class SinglePointDFTCalculator(SinglePointCalculator):
@@ -119,10 +117,7 @@ class SinglePointDFTCalculator(SinglePointCalculator):
 
         Spin-paired calculations: 1, spin-polarized calculation: 2."""
         if self.kpts is not None:
-            nspin = set()
-            for kpt in self.kpts:
-                nspin.add(kpt.s)
-            return len(nspin)
+            return len({kpt.s for kpt in self.kpts})
         return None
 
     def get_number_of_bands(self):
@@ -203,15 +198,11 @@ class SinglePointDFTCalculator(SinglePointCalculator):
             raise RuntimeError(f'No k-point with spin {spin}')
         if self.eFermi is None:
             raise RuntimeError('Fermi level is not available')
-        eH = -1.e32
-        eL = 1.e32
-        for kpt in self.kpts:
-            if kpt.s == spin:
-                for e in kpt.eps_n:
-                    if e <= self.eFermi:
-                        eH = max(eH, e)
-                    else:
-                        eL = min(eL, e)
+        eps = np.concatenate([np.asarray(kpt.eps_n, float)
+                              for kpt in self.kpts if kpt.s == spin])
+        occupied = eps <= self.eFermi
+        eH = eps[occupied].max(initial=-1.e32)
+        eL = eps[~occupied].min(initial=1.e32)
         return eH, eL
 
     def properties(self) -> Properties:
@@ -246,23 +237,31 @@ class OutputPropertyWrapper:
     def nkpts(self):
         return len(self.calc.kpts) // self.nspins
 
-    def _build_eig_occ_array(self, getter):
-        arr = np.empty((self.nspins, self.nkpts, self.nbands))
-        for s in range(self.nspins):
-            for k in range(self.nkpts):
-                value = getter(spin=s, kpt=k)
-                if value is None:
-                    return None
-                arr[s, k, :] = value
-        return arr
+    def _build_eig_occ_array(self, name, empty_is_missing=False):
+        # Group the k-points by spin in a single pass rather than looking
+        # up every (spin, kpt) pair with a linear scan over calc.kpts.
+        values = [[] for s in range(self.nspins)]
+        for kpoint in self.calc.kpts:
+            if kpoint.s < self.nspins:
+                values[kpoint.s].append(getattr(kpoint, name))
+
+        values = [spin_values[:self.nkpts] for spin_values in values]
+        for spin_values in values:
+            if len(spin_values) < self.nkpts:
+                return None
+            if empty_is_missing and any(len(value) == 0
+                                        for value in spin_values):
+                return None
+        return np.array(values, float)
 
     @propertygetter
     def eigenvalues(self):
-        return self._build_eig_occ_array(self.calc.get_eigenvalues)
+        return self._build_eig_occ_array('eps_n')
 
     @propertygetter
     def occupations(self):
-        return self._build_eig_occ_array(self.calc.get_occupation_numbers)
+        # get_occupation_numbers() reports empty f_n as missing
+        return self._build_eig_occ_array('f_n', empty_is_missing=True)
 
     @propertygetter
     def fermi_level(self):
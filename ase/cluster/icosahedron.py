@@ -3,6 +3,20 @@ import numpy as np
 from ase import Atoms
 from ase.cluster.util import get_element_info
 
+# For each vertex, the two neighbouring vertices spanning its triangle planes
+_triangle_map = np.array([[8, 9], [10, 11],
+                          [8, 9], [10, 11],
+                          [0, 1], [2, 3],
+                          [0, 1], [2, 3],
+                          [4, 5], [6, 7],
+                          [4, 5], [6, 7]])
+
+# For the first four vertices, the vertex pairs spanning the missing planes
+_fill_map = np.array([[9, 6, 8, 4],
+                      [11, 6, 10, 4],
+                      [9, 7, 8, 5],
+                      [11, 7, 10, 5]])
+
 
 def Icosahedron(symbol, noshells, latticeconstant=None):
     """
@@ -44,70 +58,75 @@ def Icosahedron(symbol, noshells, latticeconstant=None):
                           [0., 1., -t],
                           [0., -1., -t]])
 
-    positions = []
-    tags = []
-    positions.append(np.zeros(3))
-    tags.append(1)
+    positions, tags = _icosahedron_shells(noshells, verticies)
+
+    # Scale the positions
+    scaling_factor = latticeconstant / np.sqrt(2 * (1 + t**2))
+    positions *= scaling_factor
+
+    symbols = [atomic_number] * len(positions)
+    atoms = Atoms(symbols=symbols, positions=positions, tags=tags)
+    atoms.center(about=(0, 0, 0))
+    atoms.cell[:] = 0
+    return atoms
+
+
+def _icosahedron_shells(noshells, verticies):
+    """Construct the unscaled positions and shell tags of an icosahedron.
+
+    The output arrays are allocated up front and filled in place."""
+    # Shell n (counting the central atom as shell 0) holds 10 n^2 + 2 atoms
+    natoms = 1 + sum(10 * n**2 + 2 for n in range(1, noshells))
+    positions = np.empty((natoms, 3))
+    tags = np.empty(natoms, dtype=int)
+    positions[0] = 0.0
+    tags[0] = 1
+    p = 1
 
     for n in range(1, noshells):
+        start = p
+
         # Construct square edges (6)
+        i = np.arange(n + 1)[:, None]
         for k in range(0, 12, 2):
             v1 = verticies[k]
             v2 = verticies[k + 1]
-            for i in range(n + 1):
-                pos = i * v1 + (n - i) * v2
-                positions.append(pos)
-                tags.append(n + 1)
+            positions[p:p + n + 1] = i * v1 + (n - i) * v2
+            p += n + 1
 
         # Construct triangle planes (12)
         if n > 1:
-            map = {0: (8, 9), 1: (10, 11),
-                   2: (8, 9), 3: (10, 11),
-                   4: (0, 1), 5: (2, 3),
-                   6: (0, 1), 7: (2, 3),
-                   8: (4, 5), 9: (6, 7),
-                   10: (4, 5), 11: (6, 7)}
-
+            # All (i, j) with i + j < n in loop order, except (0, 0)
+            i, j = np.nonzero(np.add.outer(np.arange(n), np.arange(n)) < n)
+            i = i[1:, None]
+            j = j[1:, None]
             for k in range(12):
                 v0 = n * verticies[k]
-                v1 = (verticies[map[k][0]] - verticies[k])
-                v2 = (verticies[map[k][1]] - verticies[k])
-                for i in range(n):
-                    for j in range(n - i):
-                        if i == 0 and j == 0:
-                            continue
-                        pos = v0 + i * v1 + j * v2
-                        positions.append(pos)
-                        tags.append(n + 1)
+                v1 = (verticies[_triangle_map[k, 0]] - verticies[k])
+                v2 = (verticies[_triangle_map[k, 1]] - verticies[k])
+                positions[p:p + len(i)] = v0 + i * v1 + j * v2
+                p += len(i)
 
         # Fill missing triangle planes (8)
         if n > 2:
-            map = {0: (9, 6, 8, 4,),
-                   1: (11, 6, 10, 4),
-                   2: (9, 7, 8, 5,),
-                   3: (11, 7, 10, 5)}
-
+            # All (i, j) with i, j >= 1 and i + j < n in loop order
+            i, j = np.nonzero(np.add.outer(np.arange(n), np.arange(n)) < n)
+            inner = (i > 0) & (j > 0)
+            i = i[inner, None]
+            j = j[inner, None]
             for k in range(4):
                 v0 = n * verticies[k]
-                v1 = (verticies[map[k][0]] - verticies[k])
-                v2 = (verticies[map[k][1]] - verticies[k])
-                v3 = (verticies[map[k][2]] - verticies[k])
-                v4 = (verticies[map[k][3]] - verticies[k])
-                for i in range(1, n):
-                    for j in range(1, n - i):
-                        pos = v0 + i * v1 + j * v2
-                        positions.append(pos)
-                        tags.append(n + 1)
-                        pos = v0 + i * v3 + j * v4
-                        positions.append(pos)
-                        tags.append(n + 1)
-
-    # Scale the positions
-    scaling_factor = latticeconstant / np.sqrt(2 * (1 + t**2))
-    positions = np.array(positions) * scaling_factor
-
-    symbols = [atomic_number] * len(positions)
-    atoms = Atoms(symbols=symbols, positions=positions, tags=tags)
-    atoms.center(about=(0, 0, 0))
-    atoms.cell[:] = 0
-    return atoms
+                v1 = (verticies[_fill_map[k, 0]] - verticies[k])
+                v2 = (verticies[_fill_map[k, 1]] - verticies[k])
+                v3 = (verticies[_fill_map[k, 2]] - verticies[k])
+                v4 = (verticies[_fill_map[k, 3]] - verticies[k])
+                # The two planes of each vertex are interleaved
+                block = positions[p:p + 2 * len(i)].reshape(-1, 2, 3)
+                block[:, 0] = v0 + i * v1 + j * v2
+                block[:, 1] = v0 + i * v3 + j * v4
+                p += 2 * len(i)
+
+        tags[start:p] = n + 1
+
+    assert p == natoms
+    return positions, tags
@@ -3,7 +3,6 @@
     Find the set of partly occupied Wannier functions using the method from
     Thygesen, Hansen and Jacobsen PRB v72 i12 p125119 2005.
 """
-import functools
 import warnings
 from math import pi, sqrt
 from time import time
@@ -15,7 +14,7 @@ from ase.dft.bandgap import bandgap
 from ase.dft.kpoints import get_monkhorst_pack_size_and_offset
 from ase.io.jsonio import read_json, write_json
 from ase.parallel import paropen
-from ase.transport.tools import dagger, normalize
+from ase.transport.tools import dagger
 
 dag = dagger
 
@@ -27,8 +26,9 @@ def silent(*args, **kwargs):
 def gram_schmidt(U):
     """Orthonormalize columns of U according to the Gram-Schmidt procedure."""
     for i, col in enumerate(U.T):
-        for col2 in U.T[:i]:
-            col -= col2 * (col2.conj() @ col)
+        # Project out all previous (orthonormal) columns at once
+        Q = U[:, :i]
+        col -= Q @ (Q.conj().T @ col)
         col /= np.linalg.norm(col)
 
 
@@ -47,10 +47,13 @@ def neighbor_k_search(k_c, G_c, kpt_kc, tol=1e-4):
     # k1 - k - G + k0 = 0
     alldir_dc = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
                           [1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=int)
-    for k0_c in alldir_dc:
-        for k1, k1_c in enumerate(kpt_kc):
-            if np.linalg.norm(k1_c - k_c - G_c + k0_c) < tol:
-                return k1, k0_c
+    dist_dk = np.linalg.norm(
+        kpt_kc[None] - k_c - G_c + alldir_dc[:, None], axis=2)
+    # The first match in (k0, k1) order, as in a search over both
+    matches = np.argwhere(dist_dk < tol)
+    if len(matches):
+        d, k1 = matches[0]
+        return int(k1), alldir_dc[d]
 
     raise ValueError(f'Wannier: Did not find matching kpoint for kpt={k_c}.  '
                      'Probably non-uniform k-point grid')
@@ -112,7 +115,9 @@ def md_min(func, step=.25, tolerance=1e-6, max_iter=10000,
         fvalueold = fvalue
         dF = func.get_gradients()
 
-        V *= (dF * V.conj()).real > 0
+        # Keep only the velocity components along the force, i.e. those
+        # with Re(dF V^*) > 0, without forming the complex product
+        V[dF.real * V.real + dF.imag * V.imag <= 0] = 0
         V += step * dF
         func.step(V, **kwargs)
         fvalue = func.get_functional_value()
@@ -146,46 +151,47 @@ def rotation_from_projection(proj_nw, fixed, ortho=True):
     M  (f) = Number of fixed states
     L  (l) = Number of extra degrees of freedom
     U  (u) = Number of non-fixed states
+
+    A stack of projections with shape (..., Nb, Nw) sharing the same
+    number of fixed states can be passed to treat them all at once.
     """
 
-    Nb, Nw = proj_nw.shape
+    Nb, Nw = proj_nw.shape[-2:]
+    stack = proj_nw.shape[:-2]
     M = fixed
     L = Nw - M
     U = Nb - M
 
-    U_ww = np.empty((Nw, Nw), dtype=proj_nw.dtype)
+    U_ww = np.empty(stack + (Nw, Nw), dtype=proj_nw.dtype)
 
     # Set the section of the rotation matrix about the 'fixed' states
-    U_ww[:M] = proj_nw[:M]
+    U_ww[..., :M, :] = proj_nw[..., :M, :]
 
     if L > 0:
         # If there are extra degrees of freedom we have to select L of them
-        C_ul = np.empty((U, L), dtype=proj_nw.dtype)
-
         # Get the projections on the 'non fixed' states
-        proj_uw = proj_nw[M:]
-
-        # Obtain eigenvalues and eigevectors matrix
-        eig_w, C_ww = np.linalg.eigh(dag(proj_uw) @ proj_uw)
+        proj_uw = proj_nw[..., M:, :]
 
-        # Sort columns of eigenvectors matrix according to the eigenvalues
-        # magnitude, select only the L largest ones. Then use them to obtain
-        # the parameter C matrix.
-        C_ul[:] = proj_uw @ C_ww[:, np.argsort(- eig_w.real)[:L]]
+        # The right singular vectors of proj_uw are the eigenvectors of
+        # dag(proj_uw) @ proj_uw, already sorted by decreasing eigenvalue.
+        # Select only the L largest ones and use them to obtain the
+        # parameter C matrix.
+        _, _, Vh_ww = np.linalg.svd(proj_uw, full_matrices=False)
+        C_ul = proj_uw @ Vh_ww[..., :L, :].conj().swapaxes(-1, -2)
 
         # Compute the section of the rotation matrix about 'non fixed' states
-        U_ww[M:] = dag(C_ul) @ proj_uw
-        normalize(C_ul)
+        U_ww[..., M:, :] = C_ul.conj().swapaxes(-1, -2) @ proj_uw
+        C_ul /= np.linalg.norm(C_ul, axis=-2, keepdims=True)
     else:
         # If there are no extra degrees of freedom we do not need any parameter
         # matrix C
-        C_ul = np.empty((U, 0), dtype=proj_nw.dtype)
+        C_ul = np.empty(stack + (U, 0), dtype=proj_nw.dtype)
 
     if ortho:
         # Orthogonalize with Lowdin to take the closest orthogonal set
         lowdin(U_ww)
     else:
-        normalize(U_ww)
+        U_ww /= np.linalg.norm(U_ww, axis=-2, keepdims=True)
 
     return U_ww, C_ul
 
@@ -220,22 +226,26 @@ def scdm(pseudo_nkG, kpts, fixed_k, Nw):
 
     gamma_idx = search_for_gamma_point(kpts)
     Nk = len(kpts)
-    U_kww = []
-    C_kul = []
 
-    # compute factorization only at Gamma point
-    _, _, P = qr(pseudo_nkG[:, gamma_idx, :], mode='full',
-                 pivoting=True, check_finite=True)
-
-    for k in range(Nk):
-        A_nw = pseudo_nkG[:, k, P[:Nw]]
-        U_ww, C_ul = rotation_from_projection(proj_nw=A_nw,
-                                              fixed=fixed_k[k],
-                                              ortho=True)
-        U_kww.append(U_ww)
-        C_kul.append(C_ul)
-
-    U_kww = np.asarray(U_kww)
+    # compute factorization only at Gamma point, only the pivots are needed
+    _, P = qr(pseudo_nkG[:, gamma_idx, :], mode='r',
+              pivoting=True, check_finite=True)
+
+    # The rotations are computed in double precision whatever the
+    # precision of the wave functions
+    A_knw = pseudo_nkG[:, :, P[:Nw]].transpose(1, 0, 2).astype(complex)
+    U_kww = np.empty((Nk, Nw, Nw), dtype=A_knw.dtype)
+    C_kul = [None] * Nk
+
+    # Treat all k-points with the same number of fixed states together
+    fixed_k = np.asarray(fixed_k)
+    for M in np.unique(fixed_k):
+        k_i = np.flatnonzero(fixed_k == M)
+        U_kww[k_i], C_iul = rotation_from_projection(proj_nw=A_knw[k_i],
+                                                     fixed=M,
+                                                     ortho=True)
+        for k, C_ul in zip(k_i, C_iul):
+            C_kul[k] = C_ul
 
     return C_kul, U_kww
 
@@ -246,10 +256,10 @@ def arbitrary_s_orbitals(atoms, Ns, rng=np.random):
     one atom (< 1.5Å).
     The format of the list is the one required by GPAW in initial_wannier().
     """
-    # Create dummy copy of the Atoms object and dummy H atom
-    tmp_atoms = atoms.copy()
-    tmp_atoms.append('H')
-    s_pos = tmp_atoms.get_scaled_positions()
+    # Positions of the atoms as seen by a dummy atom placed at scaled
+    # coordinates in the same cell
+    cell_cv = atoms.cell.array
+    pos_av = atoms.get_scaled_positions() @ cell_cv
 
     orbs = []
     for _ in range(Ns):
@@ -257,13 +267,10 @@ def arbitrary_s_orbitals(atoms, Ns, rng=np.random):
         while not fine:
             # Random position
             x, y, z = rng.rand(3)
-            s_pos[-1] = [x, y, z]
-            tmp_atoms.set_scaled_positions(s_pos)
 
-            # Use dummy H atom to measure distance from any other atom
-            dists = tmp_atoms.get_distances(
-                a=-1,
-                indices=range(len(atoms)))
+            # Measure distance from any other atom
+            dists = np.linalg.norm(pos_av - np.array([x, y, z]) @ cell_cv,
+                                   axis=1)
 
             # Check if it is close to at least one atom
             if (dists < 1.5).any():
@@ -314,7 +321,8 @@ def square_modulus_of_Z_diagonal(Z_dww):
     Square modulus of the Z matrix diagonal, the diagonal is taken
     for the indexes running on the WFs.
     """
-    return np.abs(Z_dww.diagonal(0, 1, 2))**2
+    Z_dw = Z_dww.diagonal(0, 1, 2)
+    return Z_dw.real**2 + Z_dw.imag**2
 
 
 def get_kklst(kpt_kc, Gdir_dc):
@@ -333,40 +341,56 @@ def get_kklst(kpt_kc, Gdir_dc):
         kklst_dk = np.zeros((Ndir, 1), int)
         k0_dkc = Gdir_dc.reshape(-1, 1, 3)
     else:
-        kklst_dk = np.empty((Ndir, Nk), int)
-        k0_dkc = np.empty((Ndir, Nk, 3), int)
-
         # Distance between kpoints
-        kdist_c = np.empty(3)
-        for c in range(3):
-            # make a sorted list of the kpoint values in this direction
-            slist = np.argsort(kpt_kc[:, c], kind='mergesort')
-            skpoints_kc = np.take(kpt_kc, slist, axis=0)
-            kdist_c[c] = max(
-                skpoints_kc[n + 1, c] - skpoints_kc[n, c]
-                for n in range(Nk - 1)
-            )
-
-        for d, Gdir_c in enumerate(Gdir_dc):
-            for k, k_c in enumerate(kpt_kc):
-                # setup dist vector to next kpoint
-                G_c = np.where(Gdir_c > 0, kdist_c, 0)
-                if max(G_c) < 1e-4:
-                    kklst_dk[d, k] = k
-                    k0_dkc[d, k] = Gdir_c
-                else:
-                    kklst_dk[d, k], k0_dkc[d, k] = \
-                        neighbor_k_search(k_c, G_c, kpt_kc)
+        kdist_c = np.diff(np.sort(kpt_kc, axis=0), axis=0).max(axis=0)
+
+        # Label the k-points on an integer grid, fine enough to also hold
+        # shifted grids, so that neighbours are found by a table lookup
+        # rather than by searching all k-points
+        N_c = np.ones(3, int)
+        finite_c = kdist_c > 1e-4
+        N_c[finite_c] = np.rint(1 / kdist_c[finite_c])
+        N_c *= 2
+
+        def grid_index(k_xc):
+            i_xc = np.rint(k_xc * N_c).astype(int) % N_c
+            return np.ravel_multi_index(tuple(np.moveaxis(i_xc, -1, 0)), N_c)
+
+        k_g = np.full(np.prod(N_c), -1)
+        k_g[grid_index(kpt_kc)] = np.arange(Nk)
+
+        # setup dist vector to next kpoint
+        G_dc = np.where(Gdir_dc > 0, kdist_c, 0)
+        target_dkc = kpt_kc + G_dc[:, None]
+        kklst_dk = k_g[grid_index(target_dkc)]
+        k0_dkc = np.rint(target_dkc - kpt_kc[kklst_dk]).astype(int)
+
+        # k1 - k - G + k0 must vanish, with k0 one of the wrapping vectors
+        # [0, 0, 0], [1, 0, 0], ..., [0, 1, 1]
+        error_dk = np.linalg.norm(kpt_kc[kklst_dk] - target_dkc + k0_dkc,
+                                  axis=2)
+        valid_dk = ((kklst_dk >= 0) & (error_dk < 1e-4) &
+                    ((k0_dkc == 0) | (k0_dkc == 1)).all(axis=2) &
+                    (k0_dkc.sum(axis=2) < 3))
+
+        # Directions without a neighbouring k-point map onto themselves
+        nodist_d = G_dc.max(axis=1) < 1e-4
+        kklst_dk[nodist_d] = np.arange(Nk)
+        k0_dkc[nodist_d] = Gdir_dc[nodist_d, None]
+        valid_dk[nodist_d] = True
+
+        if not valid_dk.all():
+            k = np.argwhere(~valid_dk)[0, 1]
+            raise ValueError('Wannier: Did not find matching kpoint for '
+                             f'kpt={kpt_kc[k]}.  '
+                             'Probably non-uniform k-point grid')
     return kklst_dk, k0_dkc
 
 
 def get_invkklst(kklst_dk):
-    Ndir, Nk = kklst_dk.shape
-    invkklst_dk = np.empty(kklst_dk.shape, int)
-    for d in range(Ndir):
-        for k1 in range(Nk):
-            invkklst_dk[d, k1] = kklst_dk[d].tolist().index(k1)
-    return invkklst_dk
+    # For each direction, kklst_dk[d] is a permutation of the k-point
+    # indices, and the inverse permutation is obtained by sorting it.
+    return np.argsort(kklst_dk, axis=1, kind='stable')
 
 
 def choose_states(calcdata, fixedenergy, fixedstates, Nk, nwannier, log, spin):
@@ -535,6 +559,7 @@ class Wannier:
 
         self.log = log
         self.calc = calc
+        self.rng = rng
 
         self.spin = spin
         self.functional = functional
@@ -549,6 +574,10 @@ class Wannier:
         self.largeunitcell_cc = (self.unitcell_cc.T * self.kptgrid).T
         self.weight_d, self.Gdir_dc = calculate_weights(self.largeunitcell_cc)
         assert len(self.weight_d) == len(self.Gdir_dc)
+        # The spreads need the weights without normalization, to keep the
+        # physical dimension
+        self.spreadweight_d, _ = calculate_weights(self.largeunitcell_cc,
+                                                   normalize=False)
 
         if nbands is None:
             # XXX Can work with other number of bands than calculator.
@@ -660,24 +689,39 @@ class Wannier:
             write_json(fd, (self.Z_dknn, self.U_kww, self.C_kul))
 
     def update(self):
+        self._spectral_weight_knw = None
+        self._H_kww = None
+        self._H_rww = None
+
         # Update large rotation matrix V (from rotation U and coeff C)
-        for k, M in enumerate(self.fixedstates_k):
-            self.V_knw[k, :M] = self.U_kww[k, :M]
+        M_k = self.fixedstates_k
+        if np.all(M_k == M_k[0]):
+            # Same number of fixed states at every k-point: treat all at once
+            M = M_k[0]
+            self.V_knw[:, :M] = self.U_kww[:, :M]
             if M < self.nwannier:
-                self.V_knw[k, M:] = self.C_kul[k] @ self.U_kww[k, M:]
-            # else: self.V_knw[k, M:] = 0.0
+                self.V_knw[:, M:] = np.stack(self.C_kul) @ self.U_kww[:, M:]
+        else:
+            for k, M in enumerate(M_k):
+                self.V_knw[k, :M] = self.U_kww[k, :M]
+                if M < self.nwannier:
+                    self.V_knw[k, M:] = self.C_kul[k] @ self.U_kww[k, M:]
+                # else: self.V_knw[k, M:] = 0.0
 
         # Calculate the Zk matrix from the large rotation matrix:
         # Zk = V^d[k] Zbloch V[k1]
-        for d in range(self.Ndir):
-            for k in range(self.Nk):
-                k1 = self.kklst_dk[d, k]
-                self.Z_dkww[d, k] = dag(self.V_knw[k]) \
-                    @ (self.Z_dknn[d, k] @ self.V_knw[k1])
+        # for all directions and k-points at once
+        Vdag_kwn = self.V_knw.conj().swapaxes(1, 2)
+        self.Z_dkww[:] = Vdag_kwn @ (self.Z_dknn @ self.V_knw[self.kklst_dk])
 
         # Update the new Z matrix
         self.Z_dww = self.Z_dkww.sum(axis=1) / self.Nk
 
+        # The diagonal of Z and its square modulus, which enter the spread
+        # functional and its gradient
+        self._diagZ_dw = self.Z_dww.diagonal(0, 1, 2).copy()
+        self._Z2_dw = square_modulus_of_Z_diagonal(self.Z_dww)
+
     def get_optimal_nwannier(self, nwrange=5, random_reps=5, tolerance=1e-6):
         """
         The optimal value for 'nwannier', maybe.
@@ -782,14 +826,17 @@ class Wannier:
 
 
         """
-        # compute weights without normalization, to keep physical dimension
-        weight_d, _ = calculate_weights(self.largeunitcell_cc, normalize=False)
-        Z2_dw = square_modulus_of_Z_diagonal(self.Z_dww)
-        spread_w = - (np.log(Z2_dw).T @ weight_d).real / (2 * np.pi)**2
+        spread_w = (- (np.log(self._Z2_dw).T @ self.spreadweight_d).real /
+                    (2 * pi)**2)
         return spread_w
 
     def get_spectral_weight(self, w):
-        return abs(self.V_knw[:, :, w])**2 / self.Nk
+        if self._spectral_weight_knw is None:
+            # Computed for all Wannier functions at once, until next update
+            V_knw = self.V_knw
+            self._spectral_weight_knw = (V_knw.real**2 +
+                                         V_knw.imag**2) / self.Nk
+        return self._spectral_weight_knw[:, :, w].copy()
 
     def get_pdos(self, w, energies, width):
         """Projected density of states (PDOS).
@@ -800,14 +847,14 @@ class Wannier:
         of the energy grid and with the specified width.
         """
         spec_kn = self.get_spectral_weight(w)
+        eig_kn = self.calcdata.eps_skn[self.spin, :, :self.nbands]
+        energies = np.asarray(energies)
         dos = np.zeros(len(energies))
-        for k, spec_n in enumerate(spec_kn):
-            eig_n = self.calcdata.eps_skn[self.spin, k]
-            for weight, eig in zip(spec_n, eig_n):
-                # Add gaussian centered at the eigenvalue
-                x = ((energies - eig) / width)**2
-                dos += weight * np.exp(-x.clip(0., 40.)) / (sqrt(pi) * width)
-        return dos
+        for spec_n, eig_n in zip(spec_kn, eig_kn):
+            # Add gaussians centered at all eigenvalues of this k-point
+            x_ne = ((energies - eig_n[:, None]) / width)**2
+            dos += spec_n @ np.exp(-x_ne.clip(0., 40.))
+        return dos / (sqrt(pi) * width)
 
     def translate(self, w, R):
         """Translate the w'th Wannier function
@@ -815,8 +862,8 @@ class Wannier:
         The distance vector R = [n1, n2, n3], is in units of the basis
         vectors of the small cell.
         """
-        for kpt_c, U_ww in zip(self.kpt_kc, self.U_kww):
-            U_ww[:, w] *= np.exp(2.j * pi * (np.array(R) @ kpt_c))
+        phase_k = np.exp(2.j * pi * (self.kpt_kc @ np.array(R)))
+        self.U_kww[:, :, w] *= phase_k[:, None]
         self.update()
 
     def translate_to_cell(self, w, cell):
@@ -845,8 +892,11 @@ class Wannier:
         scaled_wc = (np.angle(self.Z_dww[:3].diagonal(0, 1, 2)).T *
                      self.kptgrid / (2 * pi))
         trans_wc = np.array(cell)[None] - np.floor(scaled_wc)
-        for kpt_c, U_ww in zip(self.kpt_kc, self.U_kww):
-            U_ww *= np.exp(2.j * pi * (trans_wc @ kpt_c))
+        if not trans_wc.any():
+            # Nothing to translate, keep the current state and its caches
+            return
+        phase_kw = np.exp(2.j * pi * (self.kpt_kc @ trans_wc.T))
+        self.U_kww[:] *= phase_kw[:, None]
         self.update()
 
     def distances(self, R):
@@ -858,36 +908,9 @@ class Wannier:
         different small cell.
         The dimension of the matrix is [Nw, Nw].
         """
-        Nw = self.nwannier
         cen = self.get_centers()
-        r1 = cen.repeat(Nw, axis=0).reshape(Nw, Nw, 3)
-        r2 = cen.copy()
-        for i in range(3):
-            r2 += self.unitcell_cc[i] * R[i]
-
-        r2 = np.swapaxes(r2.repeat(Nw, axis=0).reshape(Nw, Nw, 3), 0, 1)
-        return np.sqrt(np.sum((r1 - r2)**2, axis=-1))
-
-    @functools.lru_cache(maxsize=10000)
-    def _get_hopping(self, n1, n2, n3):
-        """Returns the matrix H(R)_nm=<0,n|H|R,m>.
-
-        ::
-
-                                1   _   -ik.R
-          H(R) = <0,n|H|R,m> = --- >_  e      H(k)
-                                Nk  k
-
-        where R = (n1, n2, n3) is the cell-distance (in units of the basis
-        vectors of the small cell) and n,m are indices of the Wannier functions.
-        This function caches up to 'maxsize' results.
-        """
-        R = np.array([n1, n2, n3], float)
-        H_ww = np.zeros([self.nwannier, self.nwannier], complex)
-        for k, kpt_c in enumerate(self.kpt_kc):
-            phase = np.exp(-2.j * pi * (np.array(R) @ kpt_c))
-            H_ww += self.get_hamiltonian(k) * phase
-        return H_ww / self.Nk
+        r2 = cen + np.asarray(R) @ self.unitcell_cc
+        return np.linalg.norm(cen[:, None] - r2[None], axis=-1)
 
     def get_hopping(self, R):
         """Returns the matrix H(R)_nm=<0,n|H|R,m>.
@@ -901,7 +924,24 @@ class Wannier:
         where R is the cell-distance (in units of the basis vectors of
         the small cell) and n,m are indices of the Wannier functions.
         """
-        return self._get_hopping(R[0], R[1], R[2])
+        self._get_hopping_rww()
+        H_ww = self._H_R.get(tuple(R))
+        if H_ww is None:
+            # R outside of the grid used for get_hamiltonian_kpoint()
+            phase_k = np.exp(-2.j * pi * (self.kpt_kc @ np.asarray(R, float)))
+            H_ww = np.einsum('k,kij->ij', phase_k,
+                             self._get_hamiltonian_kww(),
+                             optimize=True) / self.Nk
+        return H_ww.copy()
+
+    def _get_hamiltonian_kww(self):
+        # The Hamiltonians at all k-points, computed once until next update
+        if self._H_kww is None:
+            eps_kn = self.calcdata.eps_skn[self.spin, :, :self.nbands]
+            V_knw = self.V_knw
+            self._H_kww = ((V_knw.conj().swapaxes(1, 2) * eps_kn[:, None])
+                           @ V_knw)
+        return self._H_kww
 
     def get_hamiltonian(self, k):
         """Get Hamiltonian at existing k-vector of index k
@@ -912,9 +952,7 @@ class Wannier:
           H(k) = V    diag(eps )  V
                   k           k    k
         """
-        eps_n = self.calcdata.eps_skn[self.spin, k, :self.nbands]
-        V_nw = self.V_knw[k]
-        return (dag(V_nw) * eps_n) @ V_nw
+        return self._get_hamiltonian_kww()[k].copy()
 
     def get_hamiltonian_kpoint(self, kpt_c):
         """Get Hamiltonian at some new arbitrary k-vector
@@ -929,17 +967,24 @@ class Wannier:
         """
         self.log('Translating all Wannier functions to cell (0, 0, 0)')
         self.translate_all_to_cell()
-        max = (self.kptgrid - 1) // 2
-        N1, N2, N3 = max
-        Hk = np.zeros([self.nwannier, self.nwannier], complex)
-        for n1 in range(-N1, N1 + 1):
-            for n2 in range(-N2, N2 + 1):
-                for n3 in range(-N3, N3 + 1):
-                    R = np.array([n1, n2, n3], float)
-                    hop_ww = self.get_hopping(R)
-                    phase = np.exp(+2.j * pi * (R @ kpt_c))
-                    Hk += hop_ww * phase
-        return Hk
+        R_rc, H_rww = self._get_hopping_rww()
+        phase_r = np.exp(+2.j * pi * (R_rc @ kpt_c))
+        return np.einsum('r,rij->ij', phase_r, H_rww, optimize=True)
+
+    def _get_hopping_rww(self):
+        # All cell-distances R = (n1, n2, n3) with |n_c| <= max_c and their
+        # hopping matrices, computed once until next update
+        if self._H_rww is None:
+            max_c = (self.kptgrid - 1) // 2
+            R_rc = np.array(list(np.ndindex(*(2 * max_c + 1)))) - max_c
+            phase_rk = np.exp(-2.j * pi * (R_rc @ self.kpt_kc.T)) / self.Nk
+            self._R_rc = R_rc
+            self._H_rww = np.einsum('rk,kij->rij', phase_rk,
+                                    self._get_hamiltonian_kww(), optimize=True)
+            # Look-up table for get_hopping()
+            self._H_R = {tuple(R_c): H_ww
+                         for R_c, H_ww in zip(R_rc, self._H_rww)}
+        return self._R_rc, self._H_rww
 
     def get_function(self, index, repeat=None):
         r"""Get Wannier function on grid.
@@ -969,26 +1014,29 @@ class Wannier:
         largedim = dim * [N1, N2, N3]
 
         wanniergrid = np.zeros(largedim, dtype=complex)
-        for k, kpt_c in enumerate(self.kpt_kc):
+        # View of the large grid with the repetitions as separate axes,
+        # i.e. with shape (N1, dim[0], N2, dim[1], N3, dim[2])
+        wanniergrid_blocks = wanniergrid.reshape(
+            [n for pair in zip(repeat, dim) for n in pair])
+        # Phase exp(-2 pi i k.n) of every k-point in repetition
+        # n = (n1, n2, n3) of the cell.  The negative sign is the convention
+        # this method has always used to spread psi_k over the repetitions.
+        phase_k123 = np.exp(-2.j * pi * np.tensordot(
+            self.kpt_kc, np.indices((N1, N2, N3)), axes=1))
+        for k in range(self.Nk):
             # The coordinate vector of wannier functions
             if isinstance(index, int):
                 vec_n = self.V_knw[k, :, index]
             else:
                 vec_n = self.V_knw[k] @ index
 
-            wan_G = np.zeros(dim, complex)
-            for n, coeff in enumerate(vec_n):
-                wan_G += coeff * self.calc.get_pseudo_wave_function(
-                    n, k, self.spin, pad=True)
+            psi_nG = np.array([self.calc.get_pseudo_wave_function(
+                n, k, self.spin, pad=True) for n in range(len(vec_n))])
+            wan_G = np.tensordot(vec_n, psi_nG, axes=1)
 
             # Distribute the small wavefunction over large cell:
-            for n1 in range(N1):
-                for n2 in range(N2):
-                    for n3 in range(N3):  # sign?
-                        e = np.exp(-2.j * pi * np.array([n1, n2, n3]) @ kpt_c)
-                        wanniergrid[n1 * dim[0]:(n1 + 1) * dim[0],
-                                    n2 * dim[1]:(n2 + 1) * dim[1],
-                                    n3 * dim[2]:(n3 + 1) * dim[2]] += e * wan_G
+            wanniergrid_blocks += (phase_k123[k, :, None, :, None, :, None] *
+                                   wan_G[:, None, :, None, :])
 
         # Normalization
         wanniergrid /= np.sqrt(self.Nk)
@@ -1097,85 +1145,86 @@ class Wannier:
             O_w = self._spread_contributions()
             O_sum = np.sum(O_w)
 
-        dU = []
+        # Directions which contribute to the gradient
+        dirs = np.flatnonzero(abs(self.weight_d) >= 1.0e-6)
+        weight_d = self.weight_d[dirs]
+        diagZ_dw = self._diagZ_dw[dirs]
+
+        # Z_kk' and Z_k'k for all directions and k-points at once
+        Zconj_dkww = self.Z_dkww[dirs].conj()
+        Zconj2_dkww = Zconj_dkww[np.arange(len(dirs))[:, None],
+                                 self.invkklst_dk[dirs]]
+
+        def rotation_gradient(diag_dw):
+            temp_dkww = (diag_dw[:, None, None, :] * Zconj_dkww -
+                         diag_dw[:, None, :, None] * Zconj2_dkww)
+            return np.einsum('d,dkij->kij', weight_d,
+                             temp_dkww - temp_dkww.conj().swapaxes(2, 3))
+
+        Utemp_kww = rotation_gradient(diagZ_dw)
+        if self.functional == 'var':
+            Utemp_kww += self.nwannier * 2 * O_sum * Utemp_kww / Nw**2
+            Utemp_kww -= (self.nwannier * 2 *
+                          rotation_gradient(O_w * diagZ_dw) / Nw)
+
+        # Conjugate transposes used in the loop below, formed only once
+        Udag_kww = self.U_kww.conj().swapaxes(1, 2)
+        if np.any(self.edf_k > 0):
+            Zdag_dknn = self.Z_dknn.conj().swapaxes(2, 3)
+
         dC = []
         for k in range(self.Nk):
             M = self.fixedstates_k[k]
             L = self.edf_k[k]
-            U_ww = self.U_kww[k]
+            if L == 0:
+                continue
+
+            Udag_ww = Udag_kww[k]
             C_ul = self.C_kul[k]
-            Utemp_ww = np.zeros((Nw, Nw), complex)
             Ctemp_nw = np.zeros((Nb, Nw), complex)
 
-            for d, weight in enumerate(self.weight_d):
-                if abs(weight) < 1.0e-6:
-                    continue
-
+            for d, weight, diagZ_w in zip(dirs, weight_d, diagZ_dw):
                 Z_knn = self.Z_dknn[d]
-                diagZ_w = self.Z_dww[d].diagonal()
-                Zii_ww = np.repeat(diagZ_w, Nw).reshape(Nw, Nw)
-                if self.functional == 'var':
-                    diagOZ_w = O_w * diagZ_w
-                    OZii_ww = np.repeat(diagOZ_w, Nw).reshape(Nw, Nw)
-
                 k1 = self.kklst_dk[d, k]
                 k2 = self.invkklst_dk[d, k]
                 V_knw = self.V_knw
-                Z_kww = self.Z_dkww[d]
-
-                if L > 0:
-                    Ctemp_nw += weight * (
-                        ((Z_knn[k] @ V_knw[k1]) * diagZ_w.conj() +
-                         (dag(Z_knn[k2]) @ V_knw[k2]) * diagZ_w) @ dag(U_ww))
-
-                    if self.functional == 'var':
-                        # Gradient of the variance term, split in two terms
-                        def variance_term_computer(factor):
-                            result = (
-                                self.nwannier * 2 * weight * (
-                                    ((Z_knn[k] @ V_knw[k1]) * factor.conj() +
-                                     (dag(Z_knn[k2]) @ V_knw[k2]) * factor) @
-                                    dag(U_ww)) / Nw**2
-                            )
-                            return result
 
-                        first_term = \
-                            O_sum * variance_term_computer(diagZ_w) / Nw**2
-
-                        second_term = \
-                            - variance_term_computer(diagOZ_w) / Nw
-
-                        Ctemp_nw += first_term + second_term
-
-                temp = Zii_ww.T * Z_kww[k].conj() - Zii_ww * Z_kww[k2].conj()
-                Utemp_ww += weight * (temp - dag(temp))
+                Ctemp_nw += weight * (
+                    ((Z_knn[k] @ V_knw[k1]) * diagZ_w.conj() +
+                     (Zdag_dknn[d, k2] @ V_knw[k2]) * diagZ_w) @ Udag_ww)
 
                 if self.functional == 'var':
-                    Utemp_ww += (self.nwannier * 2 * O_sum * weight *
-                                 (temp - dag(temp)) / Nw**2)
+                    # Gradient of the variance term, split in two terms
+                    def variance_term_computer(factor):
+                        result = (
+                            self.nwannier * 2 * weight * (
+                                ((Z_knn[k] @ V_knw[k1]) * factor.conj() +
+                                 (Zdag_dknn[d, k2] @ V_knw[k2]) * factor) @
+                                Udag_ww) / Nw**2
+                        )
+                        return result
 
-                    temp = (OZii_ww.T * Z_kww[k].conj()
-                            - OZii_ww * Z_kww[k2].conj())
-                    Utemp_ww -= (self.nwannier * 2 * weight *
-                                 (temp - dag(temp)) / Nw)
+                    first_term = \
+                        O_sum * variance_term_computer(diagZ_w) / Nw**2
 
-            dU.append(Utemp_ww.ravel())
+                    second_term = \
+                        - variance_term_computer(O_w * diagZ_w) / Nw
 
-            if L > 0:
-                # Ctemp now has same dimension as V, the gradient is in the
-                # lower-right (Nb-M) x L block
-                Ctemp_ul = Ctemp_nw[M:, M:]
-                G_ul = Ctemp_ul - ((C_ul @ dag(C_ul)) @ Ctemp_ul)
-                dC.append(G_ul.ravel())
+                    Ctemp_nw += first_term + second_term
 
-        return np.concatenate(dU + dC)
+            # Ctemp now has same dimension as V, the gradient is in the
+            # lower-right (Nb-M) x L block
+            Ctemp_ul = Ctemp_nw[M:, M:]
+            G_ul = Ctemp_ul - ((C_ul @ dag(C_ul)) @ Ctemp_ul)
+            dC.append(G_ul.ravel())
+
+        return np.concatenate([Utemp_kww.ravel()] + dC)
 
     def _spread_contributions(self):
         """
         Compute the contribution of each WF to the spread functional.
         """
-        return (square_modulus_of_Z_diagonal(self.Z_dww).T
-                @ self.weight_d).real
+        return (self._Z2_dw.T @ self.weight_d).real
 
     def step(self, dX, updaterot=True, updatecoeff=True):
         # dX is (A, dC) where U->Uexp(-A) and C->C+dC
@@ -1185,16 +1234,17 @@ class Wannier:
         L_k = self.edf_k
         if updaterot:
             A_kww = dX[:Nk * Nw**2].reshape(Nk, Nw, Nw)
-            for U, A in zip(self.U_kww, A_kww):
-                H = -1.j * A.conj()
-                epsilon, Z = np.linalg.eigh(H)
-                # Z contains the eigenvectors as COLUMNS.
-                # Since H = iA, dU = exp(-A) = exp(iH) = ZDZ^d
-                dU = Z * np.exp(1.j * epsilon) @ dag(Z)
-                if U.dtype == float:
-                    U[:] = (U @ dU).real
-                else:
-                    U[:] = U @ dU
+            H_kww = -1.j * A_kww.conj()
+            epsilon_kw, Z_kww = np.linalg.eigh(H_kww)
+            # Z contains the eigenvectors as COLUMNS.
+            # Since H = iA, dU = exp(-A) = exp(iH) = ZDZ^d
+            dU_kww = (Z_kww * np.exp(1.j * epsilon_kw)[:, None]
+                      @ Z_kww.conj().swapaxes(1, 2))
+            U_kww = self.U_kww
+            if U_kww.dtype == float:
+                U_kww[:] = (U_kww @ dU_kww).real
+            else:
+                U_kww[:] = U_kww @ dU_kww
 
         if updatecoeff:
             start = 0
@@ -76,13 +76,15 @@ class WannierSpec:
         ps = calc.get_pseudo_wave_function(band=self.Nw,
                                            kpt=0, spin=0)
         Ng = ps.size
-        pseudo_nkG = np.zeros((self.Nb, self.Nk, Ng),
-                              dtype=np.complex128)
+        # Every entry is filled below, so there is no need to zero it first.
+        # Single precision is enough to select the SCDM columns, and halves
+        # the size of by far the largest array of the initial guess.
+        pseudo_nkG = np.empty((self.Nb, self.Nk, Ng), dtype=np.complex64)
         for k in range(self.Nk):
             for n in range(self.Nb):
                 pseudo_nkG[n, k] = \
                     calc.get_pseudo_wave_function(
-                        band=n, kpt=k, spin=spin).ravel()
+                        band=n, kpt=k, spin=spin).reshape(-1)
 
         # Use initial guess to determine U and C
         C_kul, U_kww = scdm(pseudo_nkG,
@@ -70,7 +70,6 @@ def get_rdf(atoms: Atoms, rmax: float, nbins: int,
     rdf = np.zeros(nbins + 1)
     dr = float(rmax / nbins)
 
-    indices = np.asarray(np.ceil(dm / dr), dtype=int)
     natoms = len(atoms)
 
     if elements is None:
@@ -78,20 +77,22 @@ def get_rdf(atoms: Atoms, rmax: float, nbins: int,
         phi = natoms / vol
         norm = 2.0 * math.pi * dr * phi * len(atoms)
 
-        indices_triu = np.triu(indices)
-        for index in range(nbins + 1):
-            rdf[index] = np.count_nonzero(indices_triu == index)
+        pair_dists = dm[np.triu_indices(natoms, k=1)]
 
     else:
         i_indices = np.where(atoms.numbers == elements[0])[0]
         phi = len(i_indices) / vol
         norm = 4.0 * math.pi * dr * phi * natoms
 
-        for i in i_indices:
-            for j in np.where(atoms.numbers == elements[1])[0]:
-                index = indices[i, j]
-                if index <= nbins:
-                    rdf[index] += 1
+        j_indices = np.where(atoms.numbers == elements[1])[0]
+        pair_dists = dm[np.ix_(i_indices, j_indices)].ravel()
+
+    # Bin the pair distances only, rounding up in place on the one scaled
+    # copy, and skip those beyond rmax
+    indices = np.divide(pair_dists, dr)
+    np.ceil(indices, out=indices)
+    indices = indices[indices <= nbins].astype(int)
+    rdf += np.bincount(indices, minlength=nbins + 1)
 
     rr = np.arange(dr / 2, rmax, dr)
     rdf[1:] /= norm * (rr * rr + (dr * dr / 12))
@@ -14,23 +14,28 @@ def read_db(filename, index, **kwargs):
     if isinstance(index, int):
         index = slice(index, index + 1 or None)
 
-    if isinstance(index, str):
-        # index is a database query string:
-        for row in db.select(index):
-            yield row.toatoms()
-    else:
-        start, stop, step = index.indices(db.count())
-        if start == stop:
-            return
-        assert step == 1
-        for row in db.select(offset=start, limit=stop - start):
-            yield row.toatoms()
+    # Keep one connection open for the whole read, so that the rows are
+    # not fetched with a new connection each
+    with db:
+        if isinstance(index, str):
+            # index is a database query string:
+            for row in db.select(index):
+                yield row.toatoms()
+        else:
+            start, stop, step = index.indices(db.count())
+            if start == stop:
+                return
+            assert step == 1
+            for row in db.select(offset=start, limit=stop - start):
+                yield row.toatoms()
 
 
 def write_db(filename, images, append=False, **kwargs):
     con = ase.db.connect(filename, serial=True, append=append, **kwargs)
-    for atoms in images:
-        con.write(atoms)
+    # Write all images in a single transaction
+    with con:
+        for atoms in images:
+            con.write(atoms)
 
 
 read_json = read_db
@@ -12,11 +12,15 @@ Units are converted using CODATA 2006, as used internally by Quantum
 ESPRESSO.
 """
 
+import io
+import mmap
 import operator as op
 import re
 import warnings
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
@@ -56,6 +60,13 @@ _PW_BANDSTRUCTURE = 'End of band structure calculation'
 _PW_DIPOLE = "Debye"
 _PW_DIPOLE_DIRECTION = "Computed dipole along edir"
 
+# Line of band energies, e.g. '   -5.6127   6.2531-10.2531   6.2531'
+_PW_BANDS_VALUES_RE = re.compile(r'(?:\s*-?\d+\.\d+)+\s*$')
+
+# Atom line of the initial structure, e.g. 'n  Sb  tau( n) = ( x y z )'
+_PW_POSITION_RE = re.compile(r'\s*\d+\s*(\S+)\s*tau\(\s*\d+\)\s*='
+                             r'\s*\(\s*(\S+)\s+(\S+)\s+(\S+)\s*\)')
+
 # ibrav error message
 ibrav_error_message = (
     'ASE does not support ibrav != 0. Note that with ibrav '
@@ -64,6 +75,124 @@ ibrav_error_message = (
     'to a high level of precision.')
 
 
+class _PWOLines:
+    """Read-only sequence of the lines of a pw.x output file.
+
+    The file is kept as a single buffer of bytes, memory mapped when it is
+    a plain file on disk, and lines are only decoded when they are accessed.
+    Both the buffer and the line offsets are built in chunks, so that no
+    other copy of the whole file is needed.
+    Indexing and slicing behave like the list returned by readlines().
+
+    Parameters
+    ----------
+    fileobj : file
+        A text file like object, positioned at the start of the output.
+    """
+
+    # Characters read, or bytes scanned for newlines, at a time
+    chunk_size = 2**20
+
+    def __init__(self, fileobj):
+        buf = _mmap_text_file(fileobj)
+        if buf is None:
+            # Encode as we go so that the text is never held as one str
+            buf = bytearray()
+            for chunk in iter(lambda: fileobj.read(self.chunk_size), ''):
+                buf += chunk.encode('utf-8')
+            self.encoding, self.errors = 'utf-8', 'strict'
+        else:
+            self.encoding, self.errors = fileobj.encoding, fileobj.errors
+        self.buf = buf
+
+        # Offsets of the start of every line, and of the end of the file
+        offsets = [np.zeros(1, np.intp)]
+        for start in range(0, len(buf), self.chunk_size):
+            block = np.frombuffer(buf, np.uint8,
+                                  min(self.chunk_size, len(buf) - start),
+                                  start)
+            offsets.append(np.flatnonzero(block == ord('\n')) + start + 1)
+        self.offsets = np.concatenate(offsets)
+        if self.offsets[-1] != len(buf):
+            self.offsets = np.append(self.offsets, len(buf))
+        self._offsets = memoryview(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            # Decode the whole block at once and split it into lines
+            lines = self._decode(start, stop).split('\n')
+            if lines[-1]:
+                # The last line of a file without final newline
+                return [line + '\n' for line in lines[:-1]] + lines[-1:]
+            return [line + '\n' for line in lines[:-1]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('line index out of range')
+        return self._decode(index, index + 1)
+
+    def _decode(self, start, stop):
+        return self.buf[self._offsets[start]:self._offsets[stop]].decode(
+            self.encoding, self.errors)
+
+    def find(self, identifiers):
+        """Return the indices of the lines containing each identifier.
+
+        All identifiers are located in a single regular expression scan
+        of the whole buffer."""
+        indexes = {identifier: [] for identifier in identifiers}
+        pattern = re.compile(b'|'.join(re.escape(identifier.encode())
+                                       for identifier in indexes))
+        matches = [(match.start(), match.group())
+                   for match in pattern.finditer(self.buf)]
+        if not matches:
+            return indexes
+        starts, groups = zip(*matches)
+        line_numbers = np.searchsorted(self.offsets, starts, side='right') - 1
+        for idx, group in zip(line_numbers.tolist(), groups):
+            identifier_indexes = indexes[group.decode()]
+            # Each line is only listed once per identifier
+            if not identifier_indexes or identifier_indexes[-1] != idx:
+                identifier_indexes.append(idx)
+        return indexes
+
+
+def _mmap_text_file(fileobj):
+    """Memory map an uncompressed text file, or return None if not possible.
+
+    Files with carriage returns are not mapped, since their line endings
+    would differ from those seen in text mode."""
+    # Compressed files have a different kind of buffer over their fileno()
+    if not (isinstance(fileobj, io.TextIOWrapper)
+            and isinstance(fileobj.buffer, io.BufferedReader)):
+        return None
+    try:
+        if fileobj.tell() != 0:
+            return None
+        buf = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Not a real file, or an empty one
+        return None
+    if buf.find(b'\r') != -1:
+        buf.close()
+        return None
+    return buf
+
+
+def _indexes_between(indexes, start, stop):
+    """Return the sorted line numbers in ``indexes`` strictly between
+    ``start`` and ``stop``."""
+    return indexes[bisect_right(indexes, start):bisect_left(indexes, stop)]
+
+
 @reader
 def read_espresso_out(fileobj, index=slice(None), results_required=True):
     """Reads Quantum ESPRESSO output files.
@@ -95,34 +224,29 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
 
 
     """
-    # work with a copy in memory for faster random access
-    pwo_lines = fileobj.readlines()
+    # work with a buffer of the whole file for fast random access
+    pwo_lines = _PWOLines(fileobj)
 
     # TODO: index -1 special case?
     # Index all the interesting points
-    indexes = {
-        _PW_START: [],
-        _PW_END: [],
-        _PW_CELL: [],
-        _PW_POS: [],
-        _PW_MAGMOM: [],
-        _PW_FORCE: [],
-        _PW_TOTEN: [],
-        _PW_STRESS: [],
-        _PW_FERMI: [],
-        _PW_HIGHEST_OCCUPIED: [],
-        _PW_HIGHEST_OCCUPIED_LOWEST_FREE: [],
-        _PW_KPTS: [],
-        _PW_BANDS: [],
-        _PW_BANDSTRUCTURE: [],
-        _PW_DIPOLE: [],
-        _PW_DIPOLE_DIRECTION: [],
-    }
-
-    for idx, line in enumerate(pwo_lines):
-        for identifier in indexes:
-            if identifier in line:
-                indexes[identifier].append(idx)
+    indexes = pwo_lines.find([
+        _PW_START,
+        _PW_END,
+        _PW_CELL,
+        _PW_POS,
+        _PW_MAGMOM,
+        _PW_FORCE,
+        _PW_TOTEN,
+        _PW_STRESS,
+        _PW_FERMI,
+        _PW_HIGHEST_OCCUPIED,
+        _PW_HIGHEST_OCCUPIED_LOWEST_FREE,
+        _PW_KPTS,
+        _PW_BANDS,
+        _PW_BANDSTRUCTURE,
+        _PW_DIPOLE,
+        _PW_DIPOLE_DIRECTION,
+    ])
 
     # Configurations are either at the start, or defined in ATOMIC_POSITIONS
     # in a subsequent step. Can deal with concatenated output files.
@@ -149,8 +273,8 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
         for config_index, config_index_next in zip(
                 all_config_indexes,
                 all_config_indexes[1:] + [len(pwo_lines)]):
-            if any(config_index < results_index < config_index_next
-                    for results_index in results_indexes):
+            if (bisect_left(results_indexes, config_index_next) >
+                    bisect_right(results_indexes, config_index)):
                 results_config_indexes.append(config_index)
 
         # slice from the subset
@@ -163,16 +287,27 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
     # when to fill in the blanks.
     pwscf_start_info = {idx: None for idx in indexes[_PW_START]}
 
+    # Lines with a CELL_PARAMETERS card, probed once per image
+    cell_indexes = set(indexes[_PW_CELL])
+    start_indexes = indexes[_PW_START]
+    # the last configuration extends right to the end of the file
+    config_bounds = all_config_indexes + [len(pwo_lines)]
+
+    # Conversion factors used for every image
+    energy_units = units['Ry']
+    force_units = units['Ry'] / units['Bohr']
+    # (the stress sign convention is opposite of ase)
+    stress_units = -1 * units['Ry'] / (units['Bohr'] ** 3)
+
     for image_index in image_indexes:
         # Find the nearest calculation start to parse info. Needed in,
         # for example, relaxation where cell is only printed at the
         # start.
-        if image_index in indexes[_PW_START]:
-            prev_start_index = image_index
-        else:
-            # The greatest start index before this structure
-            prev_start_index = [idx for idx in indexes[_PW_START]
-                                if idx < image_index][-1]
+        n_starts = bisect_right(start_indexes, image_index)
+        if n_starts == 0:
+            raise IndexError('No PWSCF start found before the configuration '
+                             f'at line {image_index + 1}')
+        prev_start_index = start_indexes[n_starts - 1]
 
         # add structure to reference if not there
         if pwscf_start_info[prev_start_index] is None:
@@ -182,20 +317,15 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
         # Get the bounds for information for this structure. Any associated
         # values will be between the image_index and the following one,
         # EXCEPT for cell, which will be 4 lines before if it exists.
-        for next_index in all_config_indexes:
-            if next_index > image_index:
-                break
-        else:
-            # right to the end of the file
-            next_index = len(pwo_lines)
+        next_index = config_bounds[bisect_right(config_bounds, image_index)]
 
         # Get the structure
         # Use this for any missing data
         prev_structure = pwscf_start_info[prev_start_index]['atoms']
-        if image_index in indexes[_PW_START]:
+        if image_index == prev_start_index:
             structure = prev_structure.copy()  # parsed from start info
         else:
-            if _PW_CELL in pwo_lines[image_index - 5]:
+            if image_index - 5 in cell_indexes:
                 # CELL_PARAMETERS would be just before positions if present
                 cell, cell_alat = get_cell_parameters(
                     pwo_lines[image_index - 5:image_index])
@@ -220,79 +350,79 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
         # Extract calculation results
         # Energy
         energy = None
-        for energy_index in indexes[_PW_TOTEN]:
-            if image_index < energy_index < next_index:
-                energy = float(
-                    pwo_lines[energy_index].split()[-2]) * units['Ry']
+        for energy_index in _indexes_between(
+                indexes[_PW_TOTEN], image_index, next_index):
+            energy = float(
+                pwo_lines[energy_index].split()[-2]) * energy_units
 
         # Forces
         forces = None
-        for force_index in indexes[_PW_FORCE]:
-            if image_index < force_index < next_index:
-                # Before QE 5.3 'negative rho' added 2 lines before forces
-                # Use exact lines to stop before 'non-local' forces
-                # in high verbosity
-                if not pwo_lines[force_index + 2].strip():
-                    force_index += 4
-                else:
-                    force_index += 2
-                # assume contiguous
-                forces = [
-                    [float(x) for x in force_line.split()[-3:]] for force_line
-                    in pwo_lines[force_index:force_index + len(structure)]]
-                forces = np.array(forces) * units['Ry'] / units['Bohr']
+        for force_index in _indexes_between(
+                indexes[_PW_FORCE], image_index, next_index):
+            # Before QE 5.3 'negative rho' added 2 lines before forces
+            # Use exact lines to stop before 'non-local' forces
+            # in high verbosity
+            if not pwo_lines[force_index + 2].strip():
+                force_index += 4
+            else:
+                force_index += 2
+            # assume contiguous
+            forces = np.loadtxt(
+                pwo_lines[force_index:force_index + len(structure)],
+                usecols=(-3, -2, -1), ndmin=2)
+            forces *= force_units
 
         # Stress
         stress = None
-        for stress_index in indexes[_PW_STRESS]:
-            if image_index < stress_index < next_index:
-                sxx, sxy, sxz = pwo_lines[stress_index + 1].split()[:3]
-                _, syy, syz = pwo_lines[stress_index + 2].split()[:3]
-                _, _, szz = pwo_lines[stress_index + 3].split()[:3]
-                stress = np.array([sxx, syy, szz, syz, sxz, sxy], dtype=float)
-                # sign convention is opposite of ase
-                stress *= -1 * units['Ry'] / (units['Bohr'] ** 3)
+        for stress_index in _indexes_between(
+                indexes[_PW_STRESS], image_index, next_index):
+            sxx, sxy, sxz = pwo_lines[stress_index + 1].split()[:3]
+            _, syy, syz = pwo_lines[stress_index + 2].split()[:3]
+            _, _, szz = pwo_lines[stress_index + 3].split()[:3]
+            stress = np.array([sxx, syy, szz, syz, sxz, sxy], dtype=float)
+            stress *= stress_units
 
         # Magmoms
         magmoms = None
-        for magmoms_index in indexes[_PW_MAGMOM]:
-            if image_index < magmoms_index < next_index:
-                magmoms = [
-                    float(mag_line.split()[-1]) for mag_line
-                    in pwo_lines[magmoms_index + 1:
-                                 magmoms_index + 1 + len(structure)]]
+        for magmoms_index in _indexes_between(
+                indexes[_PW_MAGMOM], image_index, next_index):
+            magmoms = np.loadtxt(
+                pwo_lines[magmoms_index + 1:
+                          magmoms_index + 1 + len(structure)],
+                usecols=-1, ndmin=1)
 
         # Dipole moment
         dipole = None
         if indexes[_PW_DIPOLE]:
-            for dipole_index in indexes[_PW_DIPOLE]:
-                if image_index < dipole_index < next_index:
-                    _dipole = float(pwo_lines[dipole_index].split()[-2])
+            for dipole_index in _indexes_between(
+                    indexes[_PW_DIPOLE], image_index, next_index):
+                _dipole = float(pwo_lines[dipole_index].split()[-2])
 
-            for dipole_index in indexes[_PW_DIPOLE_DIRECTION]:
-                if image_index < dipole_index < next_index:
-                    _direction = pwo_lines[dipole_index].strip()
-                    prefix = 'Computed dipole along edir('
-                    _direction = _direction[len(prefix):]
-                    _direction = int(_direction[0])
+            for dipole_index in _indexes_between(
+                    indexes[_PW_DIPOLE_DIRECTION], image_index, next_index):
+                _direction = pwo_lines[dipole_index].strip()
+                prefix = 'Computed dipole along edir('
+                _direction = _direction[len(prefix):]
+                _direction = int(_direction[0])
 
             dipole = np.eye(3)[_direction - 1] * _dipole * units['Debye']
 
         # Fermi level / highest occupied level
         efermi = None
-        for fermi_index in indexes[_PW_FERMI]:
-            if image_index < fermi_index < next_index:
-                efermi = float(pwo_lines[fermi_index].split()[-2])
+        for fermi_index in _indexes_between(
+                indexes[_PW_FERMI], image_index, next_index):
+            efermi = float(pwo_lines[fermi_index].split()[-2])
 
         if efermi is None:
-            for ho_index in indexes[_PW_HIGHEST_OCCUPIED]:
-                if image_index < ho_index < next_index:
-                    efermi = float(pwo_lines[ho_index].split()[-1])
+            for ho_index in _indexes_between(
+                    indexes[_PW_HIGHEST_OCCUPIED], image_index, next_index):
+                efermi = float(pwo_lines[ho_index].split()[-1])
 
         if efermi is None:
-            for holf_index in indexes[_PW_HIGHEST_OCCUPIED_LOWEST_FREE]:
-                if image_index < holf_index < next_index:
-                    efermi = float(pwo_lines[holf_index].split()[-2])
+            for holf_index in _indexes_between(
+                    indexes[_PW_HIGHEST_OCCUPIED_LOWEST_FREE],
+                    image_index, next_index):
+                efermi = float(pwo_lines[holf_index].split()[-2])
 
         # K-points
         ibzkpts = None
@@ -312,70 +442,82 @@ def read_espresso_out(fileobj, index=slice(None), results_required=True):
             # cell vector
             cell = structure.get_cell()
             alat = np.linalg.norm(cell[0])
-            ibzkpts = []
-            weights = []
-            for i in range(nkpts):
-                L = pwo_lines[kpts_index + i].split()
-                weights.append(float(L[-1]))
-                coord = np.array([L[-6], L[-5], L[-4].strip('),')],
-                                 dtype=float)
-                coord *= 2 * np.pi / alat
-                coord = kpoint_convert(cell, ckpts_kv=coord)
-                ibzkpts.append(coord)
-            ibzkpts = np.array(ibzkpts)
-            weights = np.array(weights)
+            # k(    1) = (   0.0000000   0.0000000   0.0000000), wk =   0.25
+            kpts_data = np.loadtxt(
+                [line.replace('),', ' ') for line
+                 in pwo_lines[kpts_index:kpts_index + nkpts]],
+                usecols=(-6, -5, -4, -1), ndmin=2)
+            ibzkpts = kpoint_convert(
+                cell, ckpts_kv=kpts_data[:, :3] * (2 * np.pi / alat))
+            weights = kpts_data[:, 3]
 
         # Bands
         kpts = None
         kpoints_warning = "Number of k-points >= 100: " + \
                           "set verbosity='high' to print the bands."
 
-        for bands_index in indexes[_PW_BANDS] + indexes[_PW_BANDSTRUCTURE]:
-            if image_index < bands_index < next_index:
-                bands_index += 1
-                # skip over the lines with DFT+U occupation matrices
-                if 'enter write_ns' in pwo_lines[bands_index]:
-                    while 'exit write_ns' not in pwo_lines[bands_index]:
-                        bands_index += 1
-                bands_index += 1
+        for bands_index in (
+                _indexes_between(indexes[_PW_BANDS],
+                                 image_index, next_index) +
+                _indexes_between(indexes[_PW_BANDSTRUCTURE],
+                                 image_index, next_index)):
+            bands_index += 1
+            # skip over the lines with DFT+U occupation matrices
+            if 'enter write_ns' in pwo_lines[bands_index]:
+                while 'exit write_ns' not in pwo_lines[bands_index]:
+                    bands_index += 1
+            bands_index += 1
 
-                if pwo_lines[bands_index].strip() == kpoints_warning:
-                    continue
+            if pwo_lines[bands_index].strip() == kpoints_warning:
+                continue
 
-                assert ibzkpts is not None
-                spin, bands, eigenvalues = 0, [], [[], []]
-
-                while True:
-                    L = pwo_lines[bands_index].replace('-', ' -').split()
-                    if len(L) == 0:
-                        if len(bands) > 0:
-                            eigenvalues[spin].append(bands)
-                            bands = []
-                    elif L == ['occupation', 'numbers']:
-                        # Skip the lines with the occupation numbers
-                        bands_index += len(eigenvalues[spin][0]) // 8 + 1
-                    elif L[0] == 'k' and L[1].startswith('='):
-                        pass
-                    elif 'SPIN' in L:
-                        if 'DOWN' in L:
-                            spin += 1
-                    else:
-                        try:
-                            bands.extend(map(float, L))
-                        except ValueError:
-                            break
-                    bands_index += 1
+            assert ibzkpts is not None
+            spin, bands, eigenvalues = 0, [], [[], []]
 
-                if spin == 1:
-                    assert len(eigenvalues[0]) == len(eigenvalues[1])
-                assert len(eigenvalues[0]) == len(ibzkpts), \
-                    (np.shape(eigenvalues), len(ibzkpts))
+            # the bands end before the next configuration
+            bands_lines = iter(pwo_lines[bands_index:next_index])
+            for line in bands_lines:
+                if _PW_BANDS_VALUES_RE.match(line):
+                    bands.append(line)
+                    continue
 
-                kpts = []
-                for s in range(spin + 1):
-                    for w, k, e in zip(weights, ibzkpts, eigenvalues[s]):
-                        kpt = SinglePointKPoint(w, s, k, eps_n=e)
-                        kpts.append(kpt)
+                L = line.split()
+                if len(L) == 0:
+                    if len(bands) > 0:
+                        # negative values may run into the previous one
+                        eigenvalues[spin].append(
+                            ' '.join(bands).replace('-', ' -').split())
+                        bands = []
+                elif L == ['occupation', 'numbers']:
+                    # Skip the lines with the occupation numbers
+                    for _ in range(len(eigenvalues[spin][0]) // 8 + 1):
+                        next(bands_lines, None)
+                elif L[0] == 'k' and L[1].startswith('='):
+                    pass
+                elif 'SPIN' in L:
+                    if 'DOWN' in L:
+                        spin += 1
+                else:
+                    # any other numbers are still band energies, the
+                    # first line that does not parse ends the bands
+                    try:
+                        [float(x) for x in line.replace('-', ' -').split()]
+                    except ValueError:
+                        break
+                    bands.append(line)
+
+            if spin == 1:
+                assert len(eigenvalues[0]) == len(eigenvalues[1])
+            assert len(eigenvalues[0]) == len(ibzkpts), \
+                (np.shape(eigenvalues), len(ibzkpts))
+            # all the eigenvalues are converted together
+            eigenvalues = np.array(eigenvalues[:spin + 1], float)
+
+            kpts = []
+            for s in range(spin + 1):
+                for w, k, e in zip(weights, ibzkpts, eigenvalues[s]):
+                    kpt = SinglePointKPoint(w, s, k, eps_n=e)
+                    kpts.append(kpt)
 
         # Put everything together
         #
@@ -438,7 +580,8 @@ def parse_pwo_start(lines, index=0):
 
     info = {}
 
-    for idx, line in enumerate(lines[index:], start=index):
+    for idx in range(index, len(lines)):
+        line = lines[idx]
         if 'celldm(1)' in line:
             # celldm(1) has more digits than alat!!
             info['celldm(1)'] = float(line.split()[1]) * units['Bohr']
@@ -453,14 +596,14 @@ def parse_pwo_start(lines, index=0):
                 [float(x) for x in lines[idx + 2].split()[3:6]],
                 [float(x) for x in lines[idx + 3].split()[3:6]]])
         elif 'positions (alat units)' in line:
-            info['symbols'], info['positions'] = [], []
+            info['symbols'] = []
+            info['positions'] = np.empty((info['nat'], 3))
 
-            for at_line in lines[idx + 1:idx + 1 + info['nat']]:
-                sym, x, y, z = parse_position_line(at_line)
+            for i in range(info['nat']):
+                sym, x, y, z = parse_position_line(lines[idx + 1 + i])
                 info['symbols'].append(label_to_symbol(sym))
-                info['positions'].append([x * info['celldm(1)'],
-                                          y * info['celldm(1)'],
-                                          z * info['celldm(1)']])
+                info['positions'][i] = x, y, z
+            info['positions'] *= info['celldm(1)']
             # This should be the end of interesting info.
             # Break here to avoid dealing with large lists of kpoints.
             # Will need to be extended for DFTCalculator info.
@@ -498,9 +641,19 @@ def parse_position_line(line):
     z : float
         z-position.
     """
-    pat = re.compile(r'\s*\d+\s*(\S+)\s*tau\(\s*\d+\)\s*='
-                     r'\s*\(\s*(\S+)\s+(\S+)\s+(\S+)\s*\)')
-    match = pat.match(line)
+    # Plain whitespace splitting covers the usual fixed-width layout; the
+    # regular expression handles anything else, e.g. a bracket touching
+    # the last coordinate.
+    tokens = line.split()
+    if (len(tokens) >= 9 and tokens[2].startswith('tau(')
+            and tokens[-6:-4] == ['=', '('] and tokens[-1] == ')'):
+        try:
+            return (tokens[1], float(tokens[-4]), float(tokens[-3]),
+                    float(tokens[-2]))
+        except ValueError:
+            pass
+
+    match = _PW_POSITION_RE.match(line)
     assert match is not None
     sym, x, y, z = match.group(1, 2, 3, 4)
     return sym, float(x), float(y), float(z)
@@ -610,11 +763,12 @@ def get_atomic_positions(lines, n_atoms, cell=None, alat=None):
     """
 
     positions = None
-    # no blanks or comment lines, can the consume n_atoms lines for positions
-    trimmed_lines = (line for line in lines if line.strip() and line[0] != '#')
+    lines = iter(lines)
 
-    for line in trimmed_lines:
-        if line.strip().startswith('ATOMIC_POSITIONS'):
+    for line in lines:
+        # cheap substring test first, most lines are not the card header
+        if ('ATOMIC_POSITIONS' in line
+                and line.strip().startswith('ATOMIC_POSITIONS')):
             if positions is not None:
                 raise ValueError('Multiple ATOMIC_POSITIONS specified')
             # Priority and behaviour tested with QE 5.3
@@ -636,19 +790,27 @@ def get_atomic_positions(lines, n_atoms, cell=None, alat=None):
                 # in future
                 cell = np.identity(3) * alat
 
-            positions = []
-            for _ in range(n_atoms):
+            # no blanks or comment lines, consume n_atoms lines for positions
+            trimmed_lines = (line for line in lines
+                             if line.strip() and line[0] != '#')
+            labels, force_mults = [], []
+            coords = np.empty((n_atoms, 3))
+            for atom in range(n_atoms):
                 split_line = next(trimmed_lines).split()
                 # These can be fractions and other expressions
-                position = np.dot((infix_float(split_line[1]),
-                                   infix_float(split_line[2]),
-                                   infix_float(split_line[3])), cell)
+                coords[atom] = (infix_float(split_line[1]),
+                                infix_float(split_line[2]),
+                                infix_float(split_line[3]))
                 if len(split_line) > 4:
                     force_mult = tuple(int(split_line[i]) for i in (4, 5, 6))
                 else:
                     force_mult = None
 
-                positions.append((split_line[0], position, force_mult))
+                labels.append(split_line[0])
+                force_mults.append(force_mult)
+
+            # transform all the coordinates at once
+            positions = list(zip(labels, coords @ cell, force_mults))
 
     return positions
 
@@ -986,6 +1148,7 @@ def ffloat(string):
         return float(string.lower().replace('d', 'e'))
 
 
+@lru_cache
 def label_to_symbol(label):
     """Convert a valid espresso ATOMIC_SPECIES label to a
     chemical symbol.
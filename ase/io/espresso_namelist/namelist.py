@@ -19,16 +19,17 @@ class Namelist(UserDict):
     to_nested() have been added to convert the dictionary to a nested
     dictionary with the correct structure for the specified binary.
     """
+    # The dunders below use self.data directly; going through UserDict
+    # roughly doubles the cost of every lookup.
     def __getitem__(self, key):
-        return super().__getitem__(key.lower())
+        return self.data[key.lower()]
 
     def __setitem__(self, key, value):
-        super().__setitem__(
-            key.lower(), Namelist(value) if isinstance(
-                value, MutableMapping) else value)
+        self.data[key.lower()] = Namelist(value) if isinstance(
+            value, MutableMapping) else value
 
     def __delitem__(self, key):
-        super().__delitem__(key.lower())
+        del self.data[key.lower()]
 
     @staticmethod
     def search_key(to_find, keys):
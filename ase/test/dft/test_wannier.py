@@ -0,0 +1,163 @@
+"""Wannier functions from a fake calculator.
+
+The batched parts of ase.dft.wannier are compared with straightforward
+per-k-point implementations.  The tests in calculator/gpaw_ cover the
+physics with a real calculator.
+"""
+import numpy as np
+import pytest
+
+from ase.build import bulk
+from ase.dft.kpoints import monkhorst_pack
+from ase.dft.wannier import Wannier, calculate_weights
+from ase.transport.tools import dagger
+
+
+class FakeCalculator:
+    """Random but reproducible data with the interface Wannier needs."""
+
+    def __init__(self, kptgrid, nbands=6, gpts=(4, 4, 5)):
+        self.atoms = bulk('Cu', 'fcc', a=3.6)
+        self.kpts = monkhorst_pack(kptgrid)
+        # Shift the grid so that it contains the Gamma point
+        self.kpts += [0.5 / n if n % 2 == 0 else 0 for n in kptgrid]
+        self.nbands = nbands
+        self.gpts = np.array(gpts)
+        rng = np.random.RandomState(42)
+        self.eps_kn = np.sort(10 * rng.random((len(self.kpts), nbands)) - 5)
+        self.Z = {}
+
+    def get_atoms(self):
+        return self.atoms.copy()
+
+    def get_bz_k_points(self):
+        return self.kpts.copy()
+
+    def get_ibz_k_points(self):
+        return self.kpts.copy()
+
+    def get_k_point_weights(self):
+        return np.ones(len(self.kpts)) / len(self.kpts)
+
+    def get_number_of_spins(self):
+        return 1
+
+    def get_number_of_bands(self):
+        return self.nbands
+
+    def get_eigenvalues(self, kpt=0, spin=0):
+        return self.eps_kn[kpt].copy()
+
+    def get_fermi_level(self):
+        return 0.0
+
+    def get_homo_lumo(self):
+        eps = self.eps_kn.ravel()
+        return eps[eps <= 0].max(), eps[eps > 0].min()
+
+    def get_number_of_grid_points(self):
+        return self.gpts.copy()
+
+    def get_wannier_localization_matrix(self, nbands, dirG, kpoint,
+                                        nextkpoint, G_I, spin):
+        # Close to unitary, like the real overlap matrices
+        key = (tuple(dirG), kpoint, nextkpoint, tuple(G_I))
+        if key not in self.Z:
+            rng = np.random.RandomState(len(self.Z))
+            A = rng.random((nbands, nbands)) + 1j * rng.random((nbands,
+                                                               nbands))
+            self.Z[key] = 0.9 * np.linalg.qr(A)[0] + 0.05 * A
+        return self.Z[key]
+
+
+def ref_Z_dkww(wan):
+    Z_dkww = np.empty((wan.Ndir, wan.Nk, wan.nwannier, wan.nwannier),
+                      complex)
+    for d in range(wan.Ndir):
+        for k in range(wan.Nk):
+            k1 = wan.kklst_dk[d, k]
+            Z_dkww[d, k] = (dagger(wan.V_knw[k]) @ wan.Z_dknn[d, k]
+                            @ wan.V_knw[k1])
+    return Z_dkww
+
+
+def ref_gradient_U(wan):
+    """Rotation part of the 'std' gradient, one k-point at a time."""
+    Nw = wan.nwannier
+    Z_dkww = ref_Z_dkww(wan)
+    Z_dww = Z_dkww.sum(axis=1) / wan.Nk
+    dU = []
+    for k in range(wan.Nk):
+        Utemp_ww = np.zeros((Nw, Nw), complex)
+        for d, weight in enumerate(wan.weight_d):
+            if abs(weight) < 1.0e-6:
+                continue
+            Zii_ww = np.repeat(Z_dww[d].diagonal(), Nw).reshape(Nw, Nw)
+            k2 = wan.invkklst_dk[d, k]
+            temp = (Zii_ww.T * Z_dkww[d, k].conj()
+                    - Zii_ww * Z_dkww[d, k2].conj())
+            Utemp_ww += weight * (temp - dagger(temp))
+        dU.append(Utemp_ww.ravel())
+    return np.concatenate(dU)
+
+
+def ref_hopping(wan, R):
+    H = 0
+    for k, kpt_c in enumerate(wan.kpt_kc):
+        V_nw = wan.V_knw[k]
+        H_ww = (dagger(V_nw) * wan.calc.eps_kn[k]) @ V_nw
+        assert wan.get_hamiltonian(k) == pytest.approx(H_ww, abs=1e-12)
+        H = H + np.exp(-2.j * np.pi * kpt_c @ R) * H_ww
+    return H / wan.Nk
+
+
+@pytest.fixture(params=[2, 'mixed'])
+def wan(request):
+    calc = FakeCalculator((3, 1, 2))
+    fixedstates = request.param
+    if fixedstates == 'mixed':
+        fixedstates = [2 + k % 3 for k in range(len(calc.kpts))]
+    return Wannier(4, calc, fixedstates=fixedstates, initialwannier='random',
+                   rng=np.random.RandomState(7))
+
+
+def check_against_reference(wan):
+    Z_dww = ref_Z_dkww(wan).sum(axis=1) / wan.Nk
+    assert wan.Z_dww == pytest.approx(Z_dww, abs=1e-12)
+
+    diagZ_dw = Z_dww.diagonal(0, 1, 2)
+    coord_wc = np.angle(diagZ_dw[:3]).T / (2 * np.pi) % 1
+    assert wan.get_centers(scaled=True) == pytest.approx(coord_wc, abs=1e-12)
+    assert wan.get_centers() == pytest.approx(
+        coord_wc @ wan.largeunitcell_cc, abs=1e-12)
+
+    weight_d, _ = calculate_weights(wan.largeunitcell_cc, normalize=False)
+    spread_w = -(np.log(abs(diagZ_dw)**2).T @ weight_d) / (2 * np.pi)**2
+    assert wan.get_spreads() == pytest.approx(spread_w, abs=1e-12)
+
+    nU = wan.Nk * wan.nwannier**2
+    assert wan.get_gradients()[:nU] == pytest.approx(ref_gradient_U(wan),
+                                                     abs=1e-12)
+
+
+def test_wannier_reference(wan):
+    check_against_reference(wan)
+    for _ in range(3):
+        wan.step(0.05 * wan.get_gradients())
+    check_against_reference(wan)
+
+
+@pytest.mark.parametrize('R', [(0, 0, 0), (1, 0, 0), (-1, 0, 1),
+                               (0, 1, 0), (2, 0, -1)])
+def test_wannier_hopping(wan, R):
+    assert wan.get_hopping(R) == pytest.approx(ref_hopping(wan, R),
+                                               abs=1e-12)
+
+    # The hoppings must follow changes of the rotations
+    wan.translate(1, [1, 0, -1])
+    assert wan.get_hopping(R) == pytest.approx(ref_hopping(wan, R),
+                                               abs=1e-12)
+    wan.translate_all_to_cell((1, 0, 1))
+    assert wan.get_hopping(R) == pytest.approx(ref_hopping(wan, R),
+                                               abs=1e-12)
+    check_against_reference(wan)
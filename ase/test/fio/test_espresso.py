@@ -17,9 +17,11 @@ from ase import Atoms
 from ase.calculators.calculator import compare_atoms
 from ase.constraints import FixAtoms, FixCartesian, FixScaled
 from ase.io.espresso import (
+    _PWOLines,
     get_atomic_species,
     parse_position_line,
     read_espresso_in,
+    read_espresso_out,
     read_fortran_namelist,
     write_espresso_in,
     write_fortran_namelist,
@@ -321,6 +323,81 @@ def test_pw_output():
     assert pw_output_traj[1].get_volume() > pw_output_traj[0].get_volume()
 
 
+@pytest.mark.parametrize('text', [pw_output_text, 'a\n\nb', 'a\r\nb\r\n'])
+@pytest.mark.parametrize('chunk_size', [3, _PWOLines.chunk_size])
+def test_pw_output_lines(text, chunk_size, monkeypatch):
+    """Lines of a pw.x output file behave like those from readlines()."""
+    monkeypatch.setattr(_PWOLines, 'chunk_size', chunk_size)
+    with open('pw_output.pwo', 'w', newline='') as pw_output_f:
+        pw_output_f.write(text)
+
+    for open_file in [lambda: open('pw_output.pwo'),
+                      lambda: io.StringIO(text)]:
+        with open_file() as fileobj:
+            expected = fileobj.readlines()
+        with open_file() as fileobj:
+            lines = _PWOLines(fileobj)
+        assert len(lines) == len(expected)
+        assert [lines[i] for i in range(len(lines))] == expected
+        assert lines[-1] == expected[-1]
+        assert lines[1:-1] == expected[1:-1]
+
+
+def test_pw_output_without_start():
+    """Positions before any PWSCF start cannot be read."""
+    text = 'ATOMIC_POSITIONS (angstrom)\nH 0.0 0.0 0.0\n' + pw_output_text
+    with pytest.raises(IndexError):
+        list(read_espresso_out(io.StringIO(text), results_required=False))
+
+
+pw_output_bands_text = """
+     Program PWSCF v.6.4.1 starts on 10Jan2020 at 10:00:00
+
+     lattice parameter (alat)  =      5.3555  a.u.
+     number of atoms/cell      =            1
+     number of atomic types    =            1
+
+     celldm(1)=  5.355500  celldm(2)=   0.000000  celldm(3)=   0.000000
+
+     crystal axes: (cart. coord. in units of alat)
+               a(1) = (   1.000000   0.000000   0.000000 )
+               a(2) = (   0.000000   1.000000   0.000000 )
+               a(3) = (   0.000000   0.000000   1.000000 )
+
+     site n.     atom                  positions (alat units)
+         1           Fe  tau(   1) = (   0.0000000   0.0000000   0.0000000  )
+
+     number of k points=     2  Marzari-Vanderbilt smearing, width (Ry)=  0.01
+                       cart. coord. in units 2pi/alat
+        k(    1) = (   0.0000000   0.0000000   0.0000000), wk =    0.5000000
+        k(    2) = (   0.5000000   0.0000000   0.0000000), wk =    1.5000000
+
+     End of self-consistent calculation
+
+          k = 0.0000 0.0000 0.0000 (  1234 PWs)   bands (ev):
+
+   -12.4525-105.4050  -1.4778   7.0954
+
+          k = 0.5000 0.0000 0.0000 (  1234 PWs)   bands (ev):
+
+   -14.1707 -12.4845  -3.0019   1.0131
+
+     3 ****
+
+!    total energy              =    -461.22511914 Ry
+"""
+
+
+def test_pw_output_bands():
+    """Band energies end at the first line that is not numbers."""
+    atoms = next(read_espresso_out(io.StringIO(pw_output_bands_text)))
+    assert atoms.calc.get_eigenvalues(kpt=0) == pytest.approx(
+        [-12.4525, -105.4050, -1.4778, 7.0954])
+    assert atoms.calc.get_eigenvalues(kpt=1) == pytest.approx(
+        [-14.1707, -12.4845, -3.0019, 1.0131])
+    assert len(atoms.calc.kpts) == 2
+
+
 def test_pw_parse_line():
     """Parse a single position line from a pw.x output file."""
     txt = """       994           Pt  tau( 994) = \
@@ -352,6 +429,10 @@ def test_pw_parse_line():
         assert abs(y - y_result[i]) < 1e-7
         assert abs(z - z_result[i]) < 1e-7
 
+    # Brackets touching the coordinates
+    line = '    12           H   tau(  12) = (-1.2500000 0.0000000 0.5000000)'
+    assert parse_position_line(line) == ('H', -1.25, 0.0, 0.5)
+
 
 def test_pw_results_required():
     """Check only configurations with results are read unless requested."""
@@ -33,3 +33,43 @@ def test_singlepoint_dft_calc():
             assert np.allclose(occ1, occ[s, k])
 
     # XXX Should check more stuff.
+
+
+def test_singlepoint_dft_homo_lumo():
+    rng = np.random.RandomState(42)
+    shape = 2, 3, 6
+    eps = 4 * rng.random(shape) - 2
+    kpts = arrays_to_kpoints(eps, np.zeros(shape), np.ones(shape[1]))
+
+    calc = SinglePointDFTCalculator(bulk('Au'), efermi=0.0, kpts=kpts)
+
+    for s in range(shape[0]):
+        homo, lumo = calc.get_homo_lumo_by_spin(s)
+        assert homo == eps[s][eps[s] <= 0].max()
+        assert lumo == eps[s][eps[s] > 0].min()
+
+    assert calc.get_homo_lumo() == (eps[eps <= 0].max(), eps[eps > 0].min())
+
+
+def test_singlepoint_dft_properties():
+    rng = np.random.RandomState(3)
+    shape = 2, 3, 4
+    eps = rng.random(shape)
+    occ = rng.random(shape)
+    weights = rng.random(shape[1])
+
+    calc = SinglePointDFTCalculator(
+        bulk('Au'), efermi=0.5, kpts=arrays_to_kpoints(eps, occ, weights))
+    props = calc.properties()
+    assert np.allclose(props['eigenvalues'], eps)
+    assert np.allclose(props['occupations'], occ)
+
+    # Without occupations, the property is simply absent:
+    for kpt in calc.kpts:
+        kpt.f_n = []
+    assert 'occupations' not in calc.properties()
+
+    # ... but empty eigenvalue rows still give an (empty) array:
+    for kpt in calc.kpts:
+        kpt.eps_n = []
+    assert calc.properties()['eigenvalues'].shape == (2, 3, 0)